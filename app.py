@@ -2,7 +2,11 @@ import os
 from dotenv import load_dotenv
 
 import dash
+import flask
+import diskcache
 import dash_bootstrap_components as dbc
+from dash import DiskcacheManager
+from plotly.io.json import to_json_plotly
 
 from ui.layout import make_layout
 from callbacks.main import register_callbacks
@@ -10,18 +14,37 @@ from callbacks.main import register_callbacks
 load_dotenv()
 
 APP_TITLE = os.getenv("APP_TITLE", "PsalmSeeker.ai")
+# Background callbacks (streamed reflection) keep their job state here
+CALLBACK_CACHE_DIR = os.getenv("CALLBACK_CACHE_DIR", "storage/callback_cache")
+
+class PsalmSeekerDash(dash.Dash):
+    """
+    Dash app that serializes the static layout once per process and serves that
+    JSON on every page load (stock Dash re-serializes the whole tree each time).
+    """
+
+    def serve_layout(self):
+        if self._layout_is_function:
+            return super().serve_layout()
+
+        cached = getattr(self, "_layout_json", None)
+        if cached is None or cached[0] is not self._layout:
+            cached = self._layout_json = (self._layout, to_json_plotly(self._layout_value()))
+        return flask.Response(cached[1], mimetype="application/json")
 
 def create_app() -> dash.Dash:
-    app = dash.Dash(
+    app = PsalmSeekerDash(
         __name__,
         title=APP_TITLE,
         external_stylesheets=[dbc.themes.BOOTSTRAP],
         suppress_callback_exceptions=True,
+        background_callback_manager=DiskcacheManager(diskcache.Cache(CALLBACK_CACHE_DIR)),
     )
     app.layout = make_layout()
     register_callbacks(app)
     return app
 
 if __name__ == "__main__":
+    # Flask dev server (single process). For concurrent users, serve wsgi:server with gunicorn.
     app = create_app()
     app.run_server(debug=True, host="127.0.0.1", port=8050)
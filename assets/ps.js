@@ -0,0 +1,64 @@
+/* assets/ps.js
+   PsalmSeeker — clientside callbacks (namespace: ps)
+*/
+
+(function () {
+  // Last results array rendered; kept private to this closure (not a window global)
+  var lastResults;
+
+  window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    ps: {
+      // Courts: build the result cards in the browser from app_state.results.
+      // app_state also changes on pick/reflect; skip re-rendering when results are unchanged.
+      render_results: function (state) {
+        var results = state ? state.results : null;
+        if (results === lastResults) {
+          return window.dash_clientside.no_update;
+        }
+        lastResults = results;
+
+        if (!results || !results.length) {
+          return { namespace: "dash_html_components", type: "Div", props: { children: "No results yet.", className: "ps-small" } };
+        }
+
+        return results.map(function (r) {
+          var title = r.verse_start
+            ? "Psalm " + r.psalm + ":" + r.verse_start + "-" + r.verse_end
+            : "Psalm " + r.psalm;
+          var snippet = r.text.length > 240 ? r.text.slice(0, 240) + "…" : r.text;
+
+          return {
+            namespace: "dash_bootstrap_components",
+            type: "Card",
+            props: {
+              className: "ps-card ps-card-strong",
+              style: { marginBottom: "10px" },
+              children: {
+                namespace: "dash_bootstrap_components",
+                type: "CardBody",
+                props: {
+                  children: [
+                    { namespace: "dash_html_components", type: "Div", props: { children: title, className: "ps-result-title", style: { fontWeight: 800 } } },
+                    { namespace: "dash_html_components", type: "Div", props: { children: "Similarity: " + r.score.toFixed(3), className: "ps-small" } },
+                    { namespace: "dash_html_components", type: "Div", props: { children: snippet, className: "ps-small", style: { marginTop: "8px" } } },
+                    { namespace: "dash_html_components", type: "Div", props: { style: { height: "10px" } } },
+                    {
+                      namespace: "dash_bootstrap_components",
+                      type: "Button",
+                      props: {
+                        children: "Enter with this Psalm",
+                        id: { type: "pick_psalm", index: r.id },
+                        className: "btn-royal",
+                        size: "sm",
+                      },
+                    },
+                  ],
+                },
+              },
+            },
+          };
+        });
+      },
+    },
+  });
+})();
@@ -1,49 +1,59 @@
-import json
-from dash import html, Input, Output, State, callback_context, ALL, no_update
-import dash_bootstrap_components as dbc
+import time
 
+from dash import html, Input, Output, State, ClientsideFunction, Patch, callback_context, ALL, no_update
+
+from ui.layout import make_holy_placeholder, make_reflect_section
 from services.retriever import PsalmRetriever
 from services.ollama import OllamaClient
 
-retriever = PsalmRetriever()
-ollama = OllamaClient()
+# Built on first use in each worker process (not at import / fork time)
+_retriever: PsalmRetriever | None = None
+_ollama: OllamaClient | None = None
 
 
-def _results_list(results: list[dict]) -> html.Div:
-    if not results:
-        return html.Div("No results yet.", className="ps-small")
+def get_retriever() -> PsalmRetriever:
+    global _retriever
+    _retriever = _retriever or PsalmRetriever()
+    return _retriever
 
-    items = []
-    for r in results:
-        title = (
-            f"Psalm {r['psalm']}:{r['verse_start']}-{r['verse_end']}"
-            if r.get("verse_start")
-            else f"Psalm {r['psalm']}"
-        )
-        snippet = (r["text"][:240] + "…") if len(r["text"]) > 240 else r["text"]
-
-        items.append(
-            dbc.Card(
-                dbc.CardBody(
-                    [
-                        html.Div(title, className="ps-result-title", style={"fontWeight": 800}),
-                        html.Div(f"Similarity: {r['score']:.3f}", className="ps-small"),
-                        html.Div(snippet, className="ps-small", style={"marginTop": "8px"}),
-                        html.Div(style={"height": "10px"}),
-                        dbc.Button(
-                            "Enter with this Psalm",
-                            id={"type": "pick_psalm", "index": r["id"]},
-                            className="btn-royal",
-                            size="sm",
-                        ),
-                    ]
-                ),
-                className="ps-card ps-card-strong",
-                style={"marginBottom": "10px"},
-            )
-        )
 
-    return html.Div(items)
+def get_ollama() -> OllamaClient:
+    global _ollama
+    _ollama = _ollama or OllamaClient()
+    return _ollama
+
+
+# Seconds between streamed reflection updates; matches the browser's progress poll
+_REFLECT_PUSH_EVERY = 0.5
+
+_MOOD_PREFIX = {
+    "lament_trust": "lament and sorrow moving toward trust and surrender: ",
+    "fear_refuge": "fear moving toward refuge and courage in God: ",
+    "waiting_strength": "patient waiting and endurance, strength renewed: ",
+    "repent_cleansing": "repentance, cleansing, mercy and restoration: ",
+    "praise_thanks": "praise, thanksgiving, adoration, joy: ",
+    "none": "",
+}
+
+# Copy with dict(_PROGRESS_ZERO) before handing it to Dash
+_PROGRESS_ZERO = {"gates": False, "courts": False, "holy": False}
+
+
+def _app_state(results=None, selected=None, progress=None) -> dict:
+    """Full value for the single app_state store (see ui/layout.py)."""
+    return {
+        "results": results,
+        "selected": selected,
+        "progress": progress or dict(_PROGRESS_ZERO),
+    }
+
+
+def _state_patch(**changes) -> Patch:
+    """Partial app_state update: only the given keys are sent and merged client-side."""
+    patch = Patch()
+    for key, value in changes.items():
+        patch[key] = value
+    return patch
 
 
 def _icon_state(done: bool):
@@ -60,22 +70,21 @@ def register_callbacks(app):
     # -------------------------
     @app.callback(
         Output("seek_status", "children"),
-        Output("results_store", "data"),
-        Output("results_out", "children"),
 
         # These are also written by other callbacks, so allow duplicates:
-        Output("selected_store", "data", allow_duplicate=True),
+        Output("app_state", "data", allow_duplicate=True),
         Output("selected_psalm_out", "children", allow_duplicate=True),
-        Output("reflection_out", "children", allow_duplicate=True),
-        Output("progress_store", "data", allow_duplicate=True),
 
         Input("btn_seek", "n_clicks"),
         State("user_prompt", "value"),
         State("mood", "value"),
         prevent_initial_call=True,
+        # `running` props are applied by dash-renderer in the browser as the callback
+        # starts/finishes (no extra request), so spinners here need no clientside callback.
         running=[
             (Output("btn_seek", "disabled"), True, False),
             (Output("seek_spinner", "style"), {"opacity": 1}, {"opacity": 0}),
+            (Output("courts_spinner", "style"), {"display": "flex"}, {"display": "none"}),
         ],
     )
     def on_seek(n_clicks, user_prompt, mood):
@@ -83,36 +92,21 @@ def register_callbacks(app):
         if not user_prompt:
             return (
                 "Write something first—your words are the doorway.",
-                None,
-                _results_list([]),
-                None,
+                _app_state(),
                 html.Div("Seek first, then choose.", className="ps-small"),
-                html.Div("", className="ps-small"),
-                {"gates": False, "courts": False, "holy": False},
             )
 
-        mood_prefix = {
-            "lament_trust": "lament and sorrow moving toward trust and surrender: ",
-            "fear_refuge": "fear moving toward refuge and courage in God: ",
-            "waiting_strength": "patient waiting and endurance, strength renewed: ",
-            "repent_cleansing": "repentance, cleansing, mercy and restoration: ",
-            "praise_thanks": "praise, thanksgiving, adoration, joy: ",
-            "none": "",
-        }.get(mood or "none", "")
+        mood_prefix = _MOOD_PREFIX.get(mood or "none", "")
 
         query = f"{mood_prefix}{user_prompt}".strip()
 
         try:
-            results = retriever.search(query=query, k=5)
+            results = get_retriever().search(query=query, k=5)
         except Exception as e:
             return (
                 f"Index not ready or retrieval failed: {e}",
-                None,
-                _results_list([]),
-                None,
+                _app_state(),
                 html.Div("Seek first, then choose.", className="ps-small"),
-                html.Div("", className="ps-small"),
-                {"gates": False, "courts": False, "holy": False},
             )
 
         # Knock means: Gates complete, others reset until user progresses again
@@ -120,46 +114,47 @@ def register_callbacks(app):
 
         return (
             "The gates are open. Choose a Psalm to step into the courts.",
-            results,
-            _results_list(results),
-            None,  # reset selection
+            _app_state(results=results, progress=progress),  # also resets selection
             html.Div("Choose a Psalm from the Courts.", className="ps-small", style={"opacity": 0.7, "fontStyle": "italic"}),
-            html.Div("", className="ps-small"),  # reset reflection
-            progress,
         )
 
     # -------------------------
-    # Pick: selection + clear reflection (Holy backtracks until reflect)
+    # Courts: result cards are rendered in the browser (assets/ps.js)
+    # -------------------------
+    app.clientside_callback(
+        ClientsideFunction(namespace="ps", function_name="render_results"),
+        Output("results_out", "children"),
+        Input("app_state", "data"),
+        prevent_initial_call=True,
+    )
+
+    # -------------------------
+    # Pick: selection (Holy backtracks until reflect)
     # -------------------------
     @app.callback(
-        Output("selected_store", "data", allow_duplicate=True),
+        Output("app_state", "data", allow_duplicate=True),
         Output("selected_psalm_out", "children", allow_duplicate=True),
-        Output("reflection_out", "children", allow_duplicate=True),
-        Output("progress_store", "data", allow_duplicate=True),
 
         Input({"type": "pick_psalm", "index": ALL}, "n_clicks"),
-        State("results_store", "data"),
+        State("app_state", "data"),
         prevent_initial_call=True,
         running=[
         (Output({"type": "pick_psalm", "index": ALL}, "disabled"), True, False),
         (Output("pick_spinner", "style"), {"display": "flex"}, {"display": "none"})],
     )
-    def on_pick(_, results):
+    def on_pick(_, state):
+        results = (state or {}).get("results")
         if not results:
             return (
-                None,
+                _app_state(),
                 html.Div("Seek first, then choose.", className="ps-small"),
-                html.Div("", className="ps-small"),
-                {"gates": False, "courts": False, "holy": False},
             )
 
         ctx = callback_context
         if not ctx.triggered:
             return (
-                None,
+                _state_patch(selected=None, progress={"gates": True, "courts": False, "holy": False}),
                 html.Div("Choose a Psalm.", className="ps-small"),
-                html.Div("", className="ps-small"),
-                {"gates": True, "courts": False, "holy": False},
             )
 
         # Dash can trigger pattern-matching callbacks when components are CREATED.
@@ -167,19 +162,17 @@ def register_callbacks(app):
         trig0 = ctx.triggered[0]
         val = trig0.get("value", None)
         if val is None or val == 0:
-            return (no_update, no_update, no_update, no_update)
+            return (no_update, no_update)
 
-        trig = trig0["prop_id"].split(".")[0]
-        trig_id = json.loads(trig)
-        pick_id = trig_id["index"]
+        # triggered_id is the already-parsed pattern-matching id dict
+        pick_id = ctx.triggered_id["index"]
 
-        chosen = next((r for r in results if r["id"] == pick_id), None)
+        results_by_id = {r["id"]: r for r in results}
+        chosen = results_by_id.get(pick_id)
         if not chosen:
             return (
-                None,
+                _state_patch(selected=None, progress={"gates": True, "courts": False, "holy": False}),
                 html.Div("Could not find that selection.", className="ps-small"),
-                html.Div("", className="ps-small"),
-                {"gates": True, "courts": False, "holy": False},
             )
 
         title = f"Psalm {chosen['psalm']}"
@@ -202,32 +195,56 @@ def register_callbacks(app):
         progress = {"gates": True, "courts": True, "holy": False}
 
         return (
-            chosen,
+            _state_patch(selected=chosen, progress=progress),
             selected_view,
-            html.Div("", className="ps-small"),  # clear reflection whenever selection changes
-            progress,
         )
 
     # -------------------------
-    # Reflect: final step
+    # Holy: mount the reflection controls once a Psalm is selected.
+    # Runs on every selection change, so the reflection starts empty again.
+    # -------------------------
+    @app.callback(
+        Output("holy_body", "children"),
+        Input("selected_psalm_out", "children"),
+        State("app_state", "data"),
+        prevent_initial_call=True,
+    )
+    def mount_reflect(_, state):
+        if (state or {}).get("selected"):
+            return make_reflect_section()
+        return make_holy_placeholder()
+
+    # -------------------------
+    # Reflect: final step (background job; tokens stream into reflection_out)
     # -------------------------
     @app.callback(
         Output("reflection_out", "children", allow_duplicate=True),
-        Output("progress_store", "data", allow_duplicate=True),
+        Output("app_state", "data", allow_duplicate=True),
 
         Input("btn_reflect", "n_clicks"),
-        State("selected_store", "data"),
+        State("app_state", "data"),
         State("user_prompt", "value"),
         prevent_initial_call=True,
+        background=True,
+        progress=Output("reflection_out", "children"),
+        interval=int(_REFLECT_PUSH_EVERY * 1000),
+        # A new pick remounts reflection_out; stop a reflection still streaming for the old Psalm
+        cancel=[Input("selected_psalm_out", "children")],
         running=[
         (Output("btn_reflect", "disabled"), True, False),
         (Output("reflect_spinner", "style"), {"display": "flex"}, {"display": "none"}),]
     )
-    def on_reflect(n_clicks, selected, user_prompt):
+    def on_reflect(set_progress, n_clicks, state, user_prompt):
+        # btn_reflect is mounted by mount_reflect; the renderer fires this callback for the new
+        # button (n_clicks=None) despite prevent_initial_call, since app_state is outside that chunk.
+        if not n_clicks:
+            return (no_update, no_update)
+
+        selected = (state or {}).get("selected")
         if not selected:
             return (
                 html.Div("Choose a Psalm first. Then ask for reflection.", className="ps-small"),
-                {"gates": True, "courts": False, "holy": False},
+                _state_patch(progress={"gates": True, "courts": False, "holy": False}),
             )
 
         prompt = (user_prompt or "").strip()
@@ -252,16 +269,27 @@ Psalm {selected['psalm']}
 Now write a guided reflection that feels like entering God's courts—thanksgiving, awe, and nearness.
 """.strip()
 
+        parts = []
+        last_push = time.monotonic()
         try:
-            out = ollama.generate(system=system, prompt=user)
+            for token in get_ollama().generate_stream(system=system, prompt=user):
+                parts.append(token)
+                # Each set_progress is a cache write; the browser only reads one per poll.
+                # The complete text goes out with the return value below.
+                now = time.monotonic()
+                if now - last_push >= _REFLECT_PUSH_EVERY:
+                    set_progress(html.Div("".join(parts), className="ps-verse"))
+                    last_push = now
         except Exception as e:
             return (
                 html.Div(f"Ollama error: {e}", className="ps-small"),
-                {"gates": True, "courts": True, "holy": False},
+                _state_patch(progress={"gates": True, "courts": True, "holy": False}),
             )
 
+        out = "".join(parts).strip()
+
         # Reflect means: all complete
-        return html.Div(out, className="ps-verse"), {"gates": True, "courts": True, "holy": True}
+        return html.Div(out, className="ps-verse"), _state_patch(progress={"gates": True, "courts": True, "holy": True})
 
     # -------------------------
     # Navbar progress renderer (single writer to icon outputs)
@@ -273,10 +301,10 @@ Now write a guided reflection that feels like entering God's courts—thanksgivi
         Output("step_courts_icon", "children"),
         Output("step_holy_icon", "className"),
         Output("step_holy_icon", "children"),
-        Input("progress_store", "data"),
+        Input("app_state", "data"),
     )
-    def render_steps(progress):
-        progress = progress or {"gates": False, "courts": False, "holy": False}
+    def render_steps(state):
+        progress = (state or {}).get("progress") or _PROGRESS_ZERO
 
         g_cls, g_child = _icon_state(bool(progress.get("gates")))
         c_cls, c_child = _icon_state(bool(progress.get("courts")))
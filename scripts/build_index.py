@@ -7,11 +7,12 @@ This script will:
 2) Extract ALL Psalms (book == "Psalms" / "Psalm", case-insensitive)
 3) Chunk each Psalm into verse-blocks designed for context
 4) Overwrite data/psalm_data_main.json with the extracted/blocked Psalm chunks
-5) Embed each chunk with Ollama embeddings and write storage/psalms_index.npz
+5) Embed each chunk with Ollama embeddings and write storage/psalms_emb.npy + storage/psalms_meta.json
+   (embeddings are cached in storage/embed_cache.sqlite, so reruns only embed changed blocks)
 
 Notes:
-- It is SAFE to rerun. It will deterministically regenerate psalm_data_main.json + psalms_index.npz.
-- Uses your existing services/ollama.py OllamaClient.embed() method.
+- It is SAFE to rerun. It will deterministically regenerate psalm_data_main.json + the index files.
+- Uses your existing services/ollama.py OllamaClient.embed_batch() method (batched /api/embed).
 """
 
 import os
@@ -21,13 +22,17 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-import json
+import hashlib
+import sqlite3
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import numpy as np
+import orjson
 from dotenv import load_dotenv
 
 from services.ollama import OllamaClient
+from services.retriever import l2_normalize
 
 load_dotenv()
 
@@ -35,7 +40,9 @@ load_dotenv()
 DATA_DIR = os.getenv("DATA_DIR", "data")
 BIBLE_PATH = os.getenv("BIBLE_PATH", os.path.join(DATA_DIR, "bible_kjv.json"))
 PSALMS_OUT_PATH = os.getenv("PSALMS_PATH", os.path.join(DATA_DIR, "psalm_data_main.json"))
-INDEX_PATH = os.getenv("INDEX_PATH", "storage/psalms_index.npz")
+INDEX_EMB_PATH = os.getenv("INDEX_EMB_PATH", "storage/psalms_emb.npy")
+INDEX_META_PATH = os.getenv("INDEX_META_PATH", "storage/psalms_meta.json")
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "storage/embed_cache.sqlite")
 
 # Chunking (tuned for PsalmSeeker “movement + context”)
 # Default: 8-verse blocks with 4-verse stride (50% overlap).
@@ -44,6 +51,11 @@ BLOCK_VERSES = int(os.getenv("BLOCK_VERSES", "8"))
 STRIDE_VERSES = int(os.getenv("STRIDE_VERSES", "4"))
 WHOLE_IF_AT_MOST = int(os.getenv("WHOLE_IF_AT_MOST", "10"))  # if psalm has <= 10 verses, keep it as 1 block
 
+# Embedding: number of blocks sent per /api/embed request
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Rows written to the embedding cache per transaction
+EMBED_CACHE_COMMIT_EVERY = 100
+
 # Formatting
 INCLUDE_VERSE_NUMBERS_IN_BLOCK_TEXT = os.getenv("INCLUDE_VERSE_NUMBERS", "true").lower() in ("1", "true", "yes")
 
@@ -61,8 +73,8 @@ def _is_psalms_book(book: str) -> bool:
 def _load_json(path: str):
     if not os.path.exists(path):
         raise FileNotFoundError(f"Missing required file: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
 
 
 def _group_psalm_verses(bible_rows: list[dict]) -> dict[int, list[tuple[int, str]]]:
@@ -73,8 +85,15 @@ def _group_psalm_verses(bible_rows: list[dict]) -> dict[int, list[tuple[int, str
     """
     by_psalm: dict[int, list[tuple[int, str]]] = defaultdict(list)
 
+    # Only ~66 distinct book names across ~31k rows: test each name once
+    is_psalms: dict[str, bool] = {}
+
     for r in bible_rows:
-        if not _is_psalms_book(r.get("book")):
+        book = r.get("book")
+        hit = is_psalms.get(book)
+        if hit is None:
+            hit = is_psalms[book] = _is_psalms_book(book)
+        if not hit:
             continue
 
         # In your bible_kjv.json structure:
@@ -179,22 +198,44 @@ def _write_psalms_json(block_rows: list[dict], out_path: str) -> None:
             }
         )
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    with open(out_path, "wb") as f:
+        f.write(orjson.dumps(out, option=orjson.OPT_INDENT_2))
 
     print(f"✅ Wrote {len(out)} psalm blocks to: {out_path}")
 
 
-def _normalize(v: np.ndarray) -> np.ndarray:
-    n = np.linalg.norm(v, axis=-1, keepdims=True) + 1e-12
-    return v / n
+def _embed_cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _open_embed_cache(path: str) -> sqlite3.Connection:
+    """
+    Sidecar cache of raw embeddings keyed by sha256(embed_model + enriched text),
+    so reruns only embed blocks whose text (or model) changed.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, dim INT, vec BLOB)")
+    conn.commit()
+    return conn
+
+
+def _embed_cache_get(conn: sqlite3.Connection, key: str) -> np.ndarray | None:
+    row = conn.execute("SELECT dim, vec FROM cache WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    dim, blob = row
+    # Truncated/corrupted blob: treat as a miss so the block is re-embedded
+    if not dim or len(blob) != dim * np.dtype(np.float32).itemsize:
+        return None
+    return np.frombuffer(blob, dtype=np.float32)
 
 
 def main() -> None:
     print("=== PsalmSeeker: build_index.py ===")
     print(f"Bible input:  {BIBLE_PATH}")
     print(f"Psalms out:   {PSALMS_OUT_PATH}")
-    print(f"Index out:    {INDEX_PATH}")
+    print(f"Index out:    {INDEX_EMB_PATH} + {INDEX_META_PATH}")
     print(f"Chunking: block={BLOCK_VERSES}, stride={STRIDE_VERSES}, whole_if<= {WHOLE_IF_AT_MOST}")
     print(f"Verse numbers in text: {INCLUDE_VERSE_NUMBERS_IN_BLOCK_TEXT}")
     print("")
@@ -222,54 +263,82 @@ def main() -> None:
     # 2) Rewrite psalm_data_main.json with the full extracted dataset
     _write_psalms_json(block_rows, PSALMS_OUT_PATH)
 
-    # 3) Build the embedding index (.npz)
-    os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+    # 3) Build the embedding index (.npy matrix + .json texts/meta)
+    os.makedirs(os.path.dirname(INDEX_EMB_PATH), exist_ok=True)
+    os.makedirs(os.path.dirname(INDEX_META_PATH), exist_ok=True)
     client = OllamaClient()
 
-    texts: list[str] = []
-    meta: list[dict] = []
-    emb_list: list[list[float]] = []
-
-    print("\nEmbedding blocks (this can take a bit on first run)...\n")
-
-    for i, r in enumerate(block_rows):
-        ps = r["psalm"]
-        vs = r["verse_start"]
-        ve = r["verse_end"]
-        block_text = r["text"]
-
-        # Enrich slightly so embeddings remain anchored to Psalm identity
-        enriched = f"Psalm {ps} ({vs}-{ve})\n{block_text}"
-
-        emb = client.embed(enriched)
-
-        texts.append(block_text)
-        meta.append(
-            {
-                "id": i + 1,  # align with psalm_data_main.json ids
-                "psalm": ps,
-                "verse_start": vs,
-                "verse_end": ve,
-            }
-        )
-        emb_list.append(emb)
-
-        if (i + 1) % 25 == 0:
-            print(f"  Embedded {i+1}/{len(block_rows)}")
-
-    emb_mat = np.array(emb_list, dtype=np.float32)
-
-    # Optional normalization here (you can also normalize at retrieval time; either works if consistent)
-    emb_mat = _normalize(emb_mat)
-
-    np.savez_compressed(
-        INDEX_PATH,
-        texts=np.array(texts, dtype=object),
-        meta=np.array(meta, dtype=object),
-        emb=emb_mat,
+    # Materialize once, aligned by position: enriched text feeds the cache keys and the batches
+    # (the "Psalm N (a-b)" prefix keeps embeddings anchored to Psalm identity)
+    enriched = [f"Psalm {r['psalm']} ({r['verse_start']}-{r['verse_end']})\n{r['text']}" for r in block_rows]
+    texts = [r["text"] for r in block_rows]
+    meta = [
+        # ids align with psalm_data_main.json
+        {"id": i, "psalm": r["psalm"], "verse_start": r["verse_start"], "verse_end": r["verse_end"]}
+        for i, r in enumerate(block_rows, start=1)
+    ]
+
+    # Reuse cached embeddings; only blocks whose text changed are sent to Ollama
+    cache = _open_embed_cache(EMBED_CACHE_PATH)
+    keys = [_embed_cache_key(client.embed_model, t) for t in enriched]
+
+    emb_list: list[np.ndarray | list[float] | None] = [None] * len(enriched)
+    for i, key in enumerate(keys):
+        emb_list[i] = _embed_cache_get(cache, key)
+    missing = [i for i, e in enumerate(emb_list) if e is None]
+
+    print(f"\nEmbedding cache: {len(enriched) - len(missing)} hits, {len(missing)} to embed ({EMBED_CACHE_PATH})")
+    print(
+        f"Embedding blocks in batches of {EMBED_BATCH_SIZE} with {client.num_parallel} parallel requests "
+        f"per host across {len(client.hosts)} host(s) "
+        "(this can take a bit on first run)...\n"
     )
 
-    print(f"\n✅ Index written to: {INDEX_PATH}")
+    if missing:
+        client.preload_embed_model()
+
+    def embed_batch_at(idxs: list[int]) -> tuple[list[int], list[list[float]]]:
+        return idxs, client.embed_batch([enriched[i] for i in idxs], batch_size=EMBED_BATCH_SIZE)
+
+    done = 0
+    pending = 0
+    # One worker per request slot; OllamaClient spreads them over OLLAMA_HOSTS
+    with ThreadPoolExecutor(max_workers=client.num_parallel * len(client.hosts)) as pool:
+        futures = [
+            pool.submit(embed_batch_at, missing[start:start + EMBED_BATCH_SIZE])
+            for start in range(0, len(missing), EMBED_BATCH_SIZE)
+        ]
+        for fut in as_completed(futures):
+            idxs, embs = fut.result()
+            for i, emb in zip(idxs, embs):
+                emb_list[i] = emb
+                vec = np.asarray(emb, dtype=np.float32)
+                cache.execute(
+                    "INSERT OR REPLACE INTO cache (key, dim, vec) VALUES (?, ?, ?)",
+                    (keys[i], int(vec.shape[0]), vec.tobytes()),
+                )
+                pending += 1
+                if pending >= EMBED_CACHE_COMMIT_EVERY:
+                    cache.commit()
+                    pending = 0
+            done += len(embs)
+            print(f"  Embedded {done}/{len(missing)}")
+
+    cache.commit()
+    cache.close()
+    client.close()
+
+    emb_mat = np.asarray(emb_list, dtype=np.float32)
+
+    # Normalize once here; the retriever memory-maps this matrix and uses it as-is
+    emb_mat = np.ascontiguousarray(l2_normalize(emb_mat), dtype=np.float32)
+
+    # Uncompressed .npy so the app can np.load(..., mmap_mode="r") it without a decompress + copy
+    np.save(INDEX_EMB_PATH, emb_mat)
+    with open(INDEX_META_PATH, "wb") as f:
+        f.write(orjson.dumps({"texts": texts, "meta": meta}))
+
+    print(f"\n✅ Index written to: {INDEX_EMB_PATH} + {INDEX_META_PATH}")
     print(f"Total blocks indexed: {len(texts)}")
     print(f"Embedding dim: {emb_mat.shape[1] if emb_mat.ndim == 2 else 'unknown'}")
     print("\nDone.")
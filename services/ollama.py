@@ -1,14 +1,61 @@
 import os
+import json
+import time
+import itertools
+import threading
+from typing import Iterator
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Seconds an embedding host is skipped after a connection failure
+HOST_COOLDOWN = 30.0
+
 class OllamaClient:
     def __init__(self):
         self.host = os.getenv("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
+        # Optional embedding endpoints (comma-separated). When set, this list replaces OLLAMA_HOST
+        # for every embed call (index build and query embeds); generation always uses self.host
+        self.hosts = [h.strip().rstrip("/") for h in os.getenv("OLLAMA_HOSTS", "").split(",") if h.strip()] or [self.host]
+        # Concurrent requests allowed per host; match the servers' OLLAMA_NUM_PARALLEL
+        self.num_parallel = max(1, int(os.getenv("OLLAMA_NUM_PARALLEL", "4")))
         self.llm_model = os.getenv("OLLAMA_LLM_MODEL", "llama3:8b")
         self.embed_model = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+        self.num_predict = int(os.getenv("OLLAMA_NUM_PREDICT", "400"))
+        # How long Ollama keeps the embedding model resident between requests
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        # One pooled session per client so HTTP keep-alive is reused across calls (and threads)
+        self._session = requests.Session()
+        # Retry 502/503/504 only: read=0 so a timed-out POST (a slow generate, a stuck
+        # embed batch) is never re-sent, connect=1 so embed failover isn't held up
+        retry = Retry(
+            total=3,
+            connect=1,
+            read=0,
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=frozenset({"POST"}),
+        )
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._rr = itertools.count()
+        self._host_sems = {h: threading.BoundedSemaphore(self.num_parallel) for h in self.hosts}
+        self._host_down_until: dict[str, float] = {}
+
+    def close(self) -> None:
+        self._session.close()
+
+    def __enter__(self) -> "OllamaClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     def generate(self, system: str, prompt: str) -> str:
         url = f"{self.host}/api/generate"
@@ -18,18 +65,97 @@ class OllamaClient:
             "system": system,
             "stream": False,
         }
-        r = requests.post(url, json=payload, timeout=120)
+        r = self._session.post(url, json=payload, timeout=120)
         r.raise_for_status()
         data = r.json()
         return data.get("response", "").strip()
 
+    def generate_stream(self, system: str, prompt: str) -> Iterator[str]:
+        """
+        Like generate(), but yields response tokens as Ollama produces them.
+        """
+        url = f"{self.host}/api/generate"
+        payload = {
+            "model": self.llm_model,
+            "prompt": prompt,
+            "system": system,
+            "stream": True,
+            "options": {"num_predict": self.num_predict},
+        }
+        with self._session.post(url, json=payload, timeout=120, stream=True) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                token = chunk.get("response", "")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    break
+
     def embed(self, text: str) -> list[float]:
-        url = f"{self.host}/api/embeddings"
-        payload = {"model": self.embed_model, "prompt": text}
-        r = requests.post(url, json=payload, timeout=120)
-        r.raise_for_status()
-        data = r.json()
-        emb = data.get("embedding")
-        if not emb:
-            raise RuntimeError("No embedding returned. Ensure an embedding model is installed and configured.")
-        return emb
\ No newline at end of file
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: list[str], batch_size: int = 64) -> list[list[float]]:
+        """
+        Embed many texts via /api/embed, sending up to batch_size inputs per request.
+        Returned embeddings are in the same order as texts.
+        """
+        out: list[list[float]] = []
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            payload = {"model": self.embed_model, "input": chunk, "keep_alive": self.keep_alive}
+            data = self._post_embed(payload)
+            embs = data.get("embeddings")
+            if not embs or len(embs) != len(chunk):
+                raise RuntimeError("No embedding returned. Ensure an embedding model is installed and configured.")
+            out.extend(embs)
+        return out
+
+    def preload_embed_model(self) -> None:
+        """
+        Ask every host to load the embedding model now, so the first real batches
+        don't queue behind a cold model load. Unreachable hosts are put in cooldown.
+        """
+        payload = {"model": self.embed_model, "input": [" "], "keep_alive": self.keep_alive}
+        for host in self.hosts:
+            try:
+                r = self._session.post(f"{host}/api/embed", json=payload, timeout=120)
+            except (requests.ConnectionError, requests.Timeout):
+                self._host_down_until[host] = time.monotonic() + HOST_COOLDOWN
+                continue
+            r.raise_for_status()
+
+    def _post_embed(self, payload: dict) -> dict:
+        """
+        POST to /api/embed on the next host (round-robin). A host that fails to connect,
+        times out (the adapter doesn't retry timeouts, so this is the first one) or answers
+        5xx is skipped for HOST_COOLDOWN seconds and the request falls over to the next host.
+        """
+        start = next(self._rr) % len(self.hosts)
+        order = self.hosts[start:] + self.hosts[:start]
+        now = time.monotonic()
+        # Healthy hosts first; hosts in cooldown are still tried as a last resort
+        order.sort(key=lambda h: self._host_down_until.get(h, 0.0) > now)
+
+        last_err: Exception | None = None
+        for host in order:
+            try:
+                with self._host_sems[host]:
+                    r = self._session.post(f"{host}/api/embed", json=payload, timeout=120)
+                # 5xx means this host is unhealthy; 4xx is a bad request and would fail anywhere
+                if r.status_code >= 500:
+                    r.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.RetryError, requests.HTTPError) as e:
+                # RetryError: the adapter's 502/503/504 retries ran out
+                self._host_down_until[host] = time.monotonic() + HOST_COOLDOWN
+                last_err = e
+                continue
+            r.raise_for_status()
+            self._host_down_until.pop(host, None)
+            return r.json()
+        # Every host failed
+        raise last_err
\ No newline at end of file
@@ -1,50 +1,80 @@
 import os
-import json
+import copy
+import time
+import threading
+from collections import OrderedDict
+
 import numpy as np
+import orjson
 from dotenv import load_dotenv
-from sklearn.neighbors import NearestNeighbors
 
 from services.ollama import OllamaClient
 
 load_dotenv()
 
-def _normalize(v: np.ndarray) -> np.ndarray:
-    n = np.linalg.norm(v, axis=-1, keepdims=True) + 1e-12
-    return v / n
+# Query cache: near-duplicate queries (cosine >= QUERY_CACHE_SIM) reuse earlier results
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "128"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "600"))  # seconds
+QUERY_CACHE_SIM = float(os.getenv("QUERY_CACHE_SIM", "0.95"))
+
+def l2_normalize(v: np.ndarray) -> np.ndarray:
+    """
+    Unit-normalize a vector [D] or the rows of a matrix [N, D].
+    Shared with scripts/build_index.py so index and queries are normalized identically.
+    """
+    if v.ndim == 1:
+        return v * (1.0 / np.sqrt(v @ v + 1e-24))
+    inv = 1.0 / np.sqrt(np.einsum("ij,ij->i", v, v) + 1e-24)
+    return v * inv[:, None]
 
 class PsalmRetriever:
     """
-    Loads a prebuilt index (npz) containing:
-      - texts: list[str]
-      - meta: list[dict]
-      - emb: float32 matrix [N, D]
-    and runs cosine KNN.
+    Loads a prebuilt index:
+      - psalms_emb.npy: unit-normalized float32 matrix [N, D], memory-mapped
+      - psalms_meta.json: {"texts": list[str], "meta": list[dict]}
+    and runs cosine KNN as a single matrix-vector product over the
+    unit-normalized embeddings.
+
+    Recent searches are cached two ways:
+      - query string -> embedding, so identical queries skip the Ollama call
+      - query embedding -> results, so near-duplicate phrasings skip the KNN
+    Both are LRU-bounded by QUERY_CACHE_SIZE and expire after QUERY_CACHE_TTL seconds.
     """
 
     def __init__(self):
-        self.index_path = os.getenv("INDEX_PATH", "storage/psalms_index.npz")
+        self.emb_path = os.getenv("INDEX_EMB_PATH", "storage/psalms_emb.npy")
+        self.meta_path = os.getenv("INDEX_META_PATH", "storage/psalms_meta.json")
         self._ollama = OllamaClient()
 
         self._loaded = False
         self._texts = []
         self._meta = []
-        self._emb = None
-        self._knn = None
+        self._emb_n = None
+
+        self._lock = threading.Lock()
+        # query string -> (insertion time, embedding); LRU order, same TTL as the results cache
+        self._qembed_cache: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._qcache_vecs = np.empty((0, 0), dtype=np.float32)
+        self._qcache_vals: list[list[dict]] = []
+        self._qcache_k: list[int] = []
+        self._qcache_time: list[float] = []  # insertion time, for TTL
+        self._qcache_used: list[float] = []  # last hit time, for LRU eviction
 
         self._try_load()
 
     def _try_load(self):
-        if not os.path.exists(self.index_path):
+        if not (os.path.exists(self.emb_path) and os.path.exists(self.meta_path)):
             return
 
-        data = np.load(self.index_path, allow_pickle=True)
-        self._texts = data["texts"].tolist()
-        self._meta = data["meta"].tolist()
-        self._emb = data["emb"].astype(np.float32)
+        with open(self.meta_path, "rb") as f:
+            data = orjson.loads(f.read())
+        self._texts = data["texts"]
+        self._meta = data["meta"]
 
-        X = _normalize(self._emb)
-        self._knn = NearestNeighbors(n_neighbors=min(10, len(X)), metric="cosine")
-        self._knn.fit(X)
+        # Already normalized by build_index.py; mmap lets the OS page it in lazily
+        # and share the pages across worker processes instead of copying into RAM.
+        self._emb_n = np.asarray(np.load(self.emb_path, mmap_mode="r"))
+        self._qcache_vecs = np.empty((0, self._emb_n.shape[1]), dtype=np.float32)
 
         self._loaded = True
 
@@ -53,18 +83,28 @@ class PsalmRetriever:
 
     def search(self, query: str, k: int = 6) -> list[dict]:
         if not self._loaded:
-            raise RuntimeError(f"Index not found at {self.index_path}. Run: python scripts/build_index.py")
+            raise RuntimeError(f"Index not found at {self.emb_path}. Run: python scripts/build_index.py")
+
+        q = self._embed_query(query)
 
-        q = np.array(self._ollama.embed(query), dtype=np.float32)
-        q = _normalize(q.reshape(1, -1))
+        cached = self._cache_get(q, k)
+        if cached is not None:
+            return cached
 
-        distances, indices = self._knn.kneighbors(q, n_neighbors=min(k, len(self._texts)))
-        distances = distances[0]
-        indices = indices[0]
+        # Both sides are unit-norm, so the dot product is the cosine similarity
+        scores = self._emb_n @ q
+
+        top_k = min(k, len(scores))
+        if top_k <= 0:
+            # argpartition(scores, -0)[-0:] would select everything
+            return []
+        # Partition on scores directly (no negated copy), then order just the top_k
+        part = np.argpartition(scores, -top_k)[-top_k:]
+        idx = part[np.argsort(scores[part])[::-1]]
 
         results = []
-        for rank, (i, d) in enumerate(zip(indices, distances)):
-            score = float(1.0 - d)  # cosine similarity
+        for i in idx.tolist():
+            score = float(scores[i])
             meta = dict(self._meta[i])
             results.append(
                 {
@@ -75,5 +115,64 @@ class PsalmRetriever:
                 }
             )
 
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results
\ No newline at end of file
+        self._cache_put(q, k, results)
+        return results
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        with self._lock:
+            hit = self._qembed_cache.get(query)
+            if hit is not None:
+                if time.monotonic() - hit[0] < QUERY_CACHE_TTL:
+                    self._qembed_cache.move_to_end(query)
+                    return hit[1]
+                del self._qembed_cache[query]
+
+        q = l2_normalize(np.array(self._ollama.embed(query), dtype=np.float32))
+
+        with self._lock:
+            self._qembed_cache[query] = (time.monotonic(), q)
+            while len(self._qembed_cache) > QUERY_CACHE_SIZE:
+                self._qembed_cache.popitem(last=False)
+        return q
+
+    def _cache_get(self, q: np.ndarray, k: int) -> list[dict] | None:
+        with self._lock:
+            self._cache_evict(time.monotonic())
+            if not self._qcache_vals:
+                return None
+
+            sims = self._qcache_vecs @ q
+            j = int(np.argmax(sims))
+            if sims[j] < QUERY_CACHE_SIM or self._qcache_k[j] < k:
+                return None
+
+            self._qcache_used[j] = time.monotonic()
+            return copy.deepcopy(self._qcache_vals[j][:k])
+
+    def _cache_put(self, q: np.ndarray, k: int, results: list[dict]) -> None:
+        if QUERY_CACHE_SIZE <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._qcache_vecs = np.vstack([self._qcache_vecs, q[None, :]])
+            self._qcache_vals.append(copy.deepcopy(results))
+            self._qcache_k.append(k)
+            self._qcache_time.append(now)
+            self._qcache_used.append(now)
+            self._cache_evict(now)
+
+    def _cache_evict(self, now: float) -> None:
+        """Drop expired entries, then least-recently-used ones beyond capacity. Caller holds the lock."""
+        keep = [i for i, t in enumerate(self._qcache_time) if now - t < QUERY_CACHE_TTL]
+        if len(keep) > QUERY_CACHE_SIZE:
+            keep = sorted(keep, key=self._qcache_used.__getitem__)[-QUERY_CACHE_SIZE:]
+            keep.sort()
+        if len(keep) == len(self._qcache_vals):
+            return
+
+        self._qcache_vecs = self._qcache_vecs[keep]
+        self._qcache_vals = [self._qcache_vals[i] for i in keep]
+        self._qcache_k = [self._qcache_k[i] for i in keep]
+        self._qcache_time = [self._qcache_time[i] for i in keep]
+        self._qcache_used = [self._qcache_used[i] for i in keep]
\ No newline at end of file
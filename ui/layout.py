@@ -1,42 +1,119 @@
+from functools import lru_cache
+
 from dash import html, dcc
-import dash_bootstrap_components as dbc
+from dash.development.base_component import Component
+
+from ui.styles import (
+    CARD_STYLE,
+    SECTION_GAP,
+    TITLE_STYLE,
+    HEADING_STYLE,
+    STEP_GAP_STYLE,
+    REFLECTION_STYLE,
+)
+
+_MOOD_OPTIONS = (
+    {"label": "No preset (pure semantic)", "value": "none"},
+    {"label": "Lament → Trust", "value": "lament_trust"},
+    {"label": "Fear → Refuge", "value": "fear_refuge"},
+    {"label": "Waiting → Strength", "value": "waiting_strength"},
+    {"label": "Repentance → Cleansing", "value": "repent_cleansing"},
+    {"label": "Praise → Thanksgiving", "value": "praise_thanks"},
+)
+
+# Header progress steps: (icon id, label, gap after)
+_STEPS = (
+    ("step_gates_icon", "Gates", True),
+    ("step_courts_icon", "Courts", True),
+    ("step_holy_icon", "Holy of Holies", False),
+)
+
+
+@lru_cache(maxsize=16)
+def _spacer(h: int) -> html.Div:
+    """Vertical gap of h px. Cached: identical id-less spacers are shared across the static tree."""
+    return html.Div(style={"height": f"{h}px"})
+
+
+@lru_cache(maxsize=4)
+def _panel_spinner(size_rem: float) -> Component:
+    """Gold panel spinner, cached per size (no id, so one instance can sit in several wrappers)."""
+    import dash_bootstrap_components as dbc
+
+    return dbc.Spinner(
+        color="warning",
+        spinnerClassName="ps-spinner",
+        spinner_style={"width": f"{size_rem}rem", "height": f"{size_rem}rem"},
+    )
+
+
+@lru_cache(maxsize=1)
+def make_holy_placeholder() -> html.Div:
+    """What "holy_body" shows while no Psalm is selected (initial layout and after each Knock)."""
+    return html.Div("Choose a Psalm in the Courts to enter.", className="ps-small")
 
-from ui.styles import CARD_STYLE, SECTION_GAP
 
+@lru_cache(maxsize=1)
+def make_reflect_section() -> list[Component]:
+    """
+    Holy of Holies reflection controls. Kept out of the initial layout and
+    mounted into "holy_body" by a callback after a Psalm is selected.
+    """
+    import dash_bootstrap_components as dbc
 
+    return [
+        _spacer(12),
+        dbc.Button("Generate reflection (Ollama)", id="btn_reflect", className="btn-royal"),
+        _spacer(10),
+
+        # Manual spinner: only shown when user clicks "Generate reflection"
+        html.Div(
+            _panel_spinner(2.2),
+            id="reflect_spinner",
+            className="ps-panel-spinner",
+            style={"display": "none"},
+        ),
+
+        html.Div(
+            id="reflection_out",
+            className="ps-card ps-card-strong",
+            style=REFLECTION_STYLE,
+        ),
+    ]
+
+@lru_cache(maxsize=1)
 def make_layout() -> html.Div:
+    """
+    Static layout (no inputs), built once per process and reused.
+    Callers must not mutate the returned tree.
+    """
+    # Imported here so importing ui.layout stays cheap; paid once thanks to the cache above
+    import dash_bootstrap_components as dbc
+
     header = dbc.Navbar(
         dbc.Container(
-            [
+            (
                 html.Div(
-                    [
-                        html.Div("PsalmSeeker", className="ps-title", style={"fontSize": "1.35rem"}),
+                    (
+                        html.Div("PsalmSeeker", className="ps-title", style=TITLE_STYLE),
                         html.Div(
                             "Enter His gates with thanksgiving • His courts with praise • Into His presence by the Word",
                             className="ps-subtitle",
                         ),
-                    ]
+                    )
                 ),
                 html.Div(
                     [
                         html.Span(
-                            [html.Span(className="ps-step-dot", id="step_gates_icon"), "Gates"],
-                            className="ps-step",
-                            style={"marginRight": "8px"},
-                        ),
-                        html.Span(
-                            [html.Span(className="ps-step-dot", id="step_courts_icon"), "Courts"],
-                            className="ps-step",
-                            style={"marginRight": "8px"},
-                        ),
-                        html.Span(
-                            [html.Span(className="ps-step-dot", id="step_holy_icon"), "Holy of Holies"],
+                            (html.Span(className="ps-step-dot", id=icon_id), label),
                             className="ps-step",
-                        ),
+                            style=STEP_GAP_STYLE if gap else None,
+                        )
+                        for icon_id, label, gap in _STEPS
                     ],
                     className="d-none d-md-flex",
                 ),
-            ],
+            ),
             fluid=True,
         ),
         className="ps-header",
@@ -45,9 +122,9 @@ def make_layout() -> html.Div:
 
     gates = dbc.Card(
         dbc.CardBody(
-            [
+            (
                 html.Div("Gates", className="ps-pill"),
-                html.H4("Come as you are", style={"marginTop": "10px"}),
+                html.H4("Come as you are", style=HEADING_STYLE),
                 html.Div(
                     "Write honestly. This is not a search box—it's a doorway. We’ll retrieve Psalms by meaning, not keywords.",
                     className="ps-small",
@@ -60,47 +137,33 @@ def make_layout() -> html.Div:
                     placeholder="Example: I feel fear about the future, but I want to trust God without pretending I’m okay.",
                     rows=4,
                 ),
-                html.Div(style={"height": "10px"}),
-                dbc.Row(
-                    [
-                        dbc.Col(
-                            dbc.Select(
-                                id="mood",
-                                className="ps-dropdown",
-                                options=[
-                                    {"label": "No preset (pure semantic)", "value": "none"},
-                                    {"label": "Lament → Trust", "value": "lament_trust"},
-                                    {"label": "Fear → Refuge", "value": "fear_refuge"},
-                                    {"label": "Waiting → Strength", "value": "waiting_strength"},
-                                    {"label": "Repentance → Cleansing", "value": "repent_cleansing"},
-                                    {"label": "Praise → Thanksgiving", "value": "praise_thanks"},
-                                ],
-                                value="none",
-                            ),
-                            width=7,
+                _spacer(10),
+                html.Div(
+                    (
+                        dbc.Select(
+                            id="mood",
+                            className="ps-dropdown",
+                            options=_MOOD_OPTIONS,
+                            value="none",
                         ),
-                        dbc.Col(
-                            html.Div(
-                                [
-                                    dbc.Button("Knock", id="btn_seek", className="btn-royal w-100"),
-                                    html.Div(
-                                        dbc.Spinner(size="sm", color="warning", spinnerClassName="ps-spinner"),
-                                        id="seek_spinner",
-                                        className="ps-inline-spinner",
-                                        style={"opacity": 0},
-                                    ),
-                                ],
-                                className="ps-action-wrap",
+                        html.Div(
+                            (
+                                dbc.Button("Knock", id="btn_seek", className="btn-royal w-100"),
+                                html.Div(
+                                    dbc.Spinner(size="sm", color="warning", spinnerClassName="ps-spinner"),
+                                    id="seek_spinner",
+                                    className="ps-inline-spinner",
+                                    style={"opacity": 0},
+                                ),
                             ),
-                            width=5,
+                            className="ps-action-wrap",
                         ),
-                    ],
-                    align="center",
-                    className="g-2",
+                    ),
+                    className="ps-knock-row",
                 ),
-                html.Div(style={"height": "8px"}),
+                _spacer(8),
                 html.Div(id="seek_status", className="ps-small"),
-            ]
+            )
         ),
         className="ps-card",
         style=CARD_STYLE,
@@ -108,18 +171,20 @@ def make_layout() -> html.Div:
 
     courts = dbc.Card(
         dbc.CardBody(
-            [
+            (
                 html.Div("Courts", className="ps-pill"),
-                html.H4("Psalms that meet you where you are", style={"marginTop": "10px"}),
+                html.H4("Psalms that meet you where you are", style=HEADING_STYLE),
                 html.Div("Select one to enter deeper.", className="ps-small"),
                 html.Div(className="ps-divider"),
-                # Courts loading is OK: it should show only when Knock is working on Courts.
-                dcc.Loading(
-                    html.Div(id="results_out", className="ps-scroll-pane"),
-                    type="circle",
-                    className="ps-loading",
+                # Manual spinner: only shown while Knock is retrieving (toggled by on_seek's `running`)
+                html.Div(
+                    html.Div(className="ps-css-spinner"),
+                    id="courts_spinner",
+                    className="ps-panel-spinner",
+                    style={"display": "none"},
                 ),
-            ],
+                html.Div(id="results_out", className="ps-scroll-pane"),
+            ),
             style={"display": "flex", "flexDirection": "column"},
         ),
         className="ps-card",
@@ -128,15 +193,15 @@ def make_layout() -> html.Div:
 
     holy = dbc.Card(
         dbc.CardBody(
-            [
+            (
                 html.Div("Holy of Holies", className="ps-pill"),
-                html.H4("Remain with the Word", style={"marginTop": "10px"}),
+                html.H4("Remain with the Word", style=HEADING_STYLE),
                 html.Div("Read slowly. Then receive a guided reflection from your local model.", className="ps-small"),
                 html.Div(className="ps-divider"),
 
                 # Manual spinner: only shown when user clicks "Enter with this Psalm"
                 html.Div(
-                    dbc.Spinner(color="warning", spinnerClassName="ps-spinner", spinner_style={"width": "2.0rem", "height": "2.0rem"}),
+                    _panel_spinner(2.0),
                     id="pick_spinner",
                     className="ps-panel-spinner",
                     style={"display": "none"},
@@ -145,62 +210,43 @@ def make_layout() -> html.Div:
                 # No dcc.Loading wrapper here (prevents Knock from showing spinners in Holy)
                 html.Div(id="selected_psalm_out"),
 
-                html.Div(style={"height": "12px"}),
-                dbc.Button("Generate reflection (Ollama)", id="btn_reflect", className="btn-royal"),
-                html.Div(style={"height": "10px"}),
-
-                # Manual spinner: only shown when user clicks "Generate reflection"
-                html.Div(
-                    dbc.Spinner(color="warning", spinnerClassName="ps-spinner", spinner_style={"width": "2.2rem", "height": "2.2rem"}),
-                    id="reflect_spinner",
-                    className="ps-panel-spinner",
-                    style={"display": "none"},
-                ),
-
-                html.Div(
-                    id="reflection_out",
-                    className="ps-card ps-card-strong",
-                    style={"padding": "14px", "borderRadius": "18px"},
-                ),
-            ]
+                # Reflection controls are mounted here once a Psalm is picked (see make_reflect_section)
+                html.Div(make_holy_placeholder(), id="holy_body"),
+            )
         ),
         className="ps-card",
         style=CARD_STYLE,
     )
 
     stores = html.Div(
-        [
-            dcc.Store(id="results_store"),
-            dcc.Store(id="selected_store"),
-            dcc.Store(id="progress_store", data={"gates": False, "courts": False, "holy": False}),
-        ]
+        (
+            # Single store for results / selection / journey progress
+            dcc.Store(
+                id="app_state",
+                data={"results": None, "selected": None, "progress": {"gates": False, "courts": False, "holy": False}},
+            ),
+        )
     )
 
     return html.Div(
-        [
+        (
             header,
             stores,
             dbc.Container(
-                [
-                    html.Div(style={"height": "18px"}),
-                    dbc.Row(
-                        [
-                            dbc.Col(gates, md=6),
-                            dbc.Col(courts, md=6),
-                        ],
-                        className="g-3",
-                    ),
-                    html.Div(style={"height": "14px"}),
-                    dbc.Row([dbc.Col(holy)], className="g-3"),
-                    html.Div(style={"height": "30px"}),
+                (
+                    _spacer(18),
+                    html.Div((gates, courts), className="ps-grid-2"),
+                    _spacer(14),
+                    holy,
+                    _spacer(30),
                     html.Div(
                         "PsalmSeeker v0 • local-first • Scripture retrieval + reflection",
                         className="ps-small",
                         style={"textAlign": "center"},
                     ),
-                    html.Div(style={"height": "20px"}),
-                ],
+                    _spacer(20),
+                ),
                 fluid=True,
             ),
-        ]
+        )
     )
\ No newline at end of file
@@ -1,6 +1,14 @@
+# Style dicts are passed by reference to every component that uses them
+# (Dash does not copy props), so treat them as read-only.
+
 CARD_STYLE = {
     "padding": "16px",
     "borderRadius": "18px",
 }
 
-SECTION_GAP = {"marginTop": "14px"}
\ No newline at end of file
+SECTION_GAP = {"marginTop": "14px"}
+
+TITLE_STYLE = {"fontSize": "1.35rem"}
+HEADING_STYLE = {"marginTop": "10px"}
+STEP_GAP_STYLE = {"marginRight": "8px"}
+REFLECTION_STYLE = {"padding": "14px", "borderRadius": "18px"}
\ No newline at end of file
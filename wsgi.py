@@ -0,0 +1,14 @@
+# wsgi.py
+"""
+Production entry point for a multi-worker WSGI server, e.g.:
+
+    gunicorn -w 4 -k gthread --threads 8 --timeout 180 wsgi:server
+
+Each worker builds its own retriever/Ollama client on first use; the embedding
+matrix is memory-mapped, so workers share it through the OS page cache.
+"""
+
+from app import create_app
+
+app = create_app()
+server = app.server
\ No newline at end of file